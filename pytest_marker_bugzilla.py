@@ -44,16 +44,32 @@ allows you easy comparison in condition guards or inside tests.
 
     --bugzilla-looseversion-fields=fixed_in,target_release
 
+Only the fields used by the plugin (id, status, summary, resolution, version,
+fixed_in, target_release and the looseversion fields) are fetched. Fields
+used by your guards or tests have to be requested comma separated:
+
+    --bugzilla-extra-fields=component,severity
+
+Fetched bugs are stored in the pytest cache directory and reused by following
+runs until they are older than the given number of seconds (0 disables it):
+
+    --bugzilla-cache-ttl=3600
+
 Authors:
     Eric L. Sammons
     Milan Falešník
 """
+import hashlib
 import inspect
 import logging
 import os
+import random
 import re
-from distutils.version import LooseVersion
-from functools import wraps
+import socket
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, total_ordering, wraps
 
 import bugzilla
 import pytest
@@ -61,8 +77,22 @@ import six
 
 
 logger = logging.getLogger(__name__)
-_bugs_pool = {}  # Cache bugs for greater speed
+_bugs_pool_size = 2048  # Max. number of bugs kept in the pool
+_getbugs_chunk_size = 1200  # Max. number of bugs fetched by one request
+_retries = 3  # Attempts of one request to Bugzilla
+_retry_delay = 0.5  # Seconds, doubled after every failed attempt
+_auth_http_statuses = frozenset((401, 403))  # Not worth retrying
 _default_looseversion_fields = "fixed_in,target_release"
+_version_prefix_re = re.compile(r"^[^0-9]+")  # Stripped from loose versions
+_running_statuses = frozenset(("VERIFIED", "ON_QA"))  # Ready for QE
+_hot_bug_fields = ("id", "status")  # Read for every evaluated test
+_default_cache_ttl = 3600
+_default_workers = 8
+# Bug attributes fetched from Bugzilla and stored in the pytest cache
+_default_bug_fields = (
+    "id", "status", "fixed_in", "target_release", "version", "resolution",
+    "summary",
+)
 
 
 def get_value_from_config_parser(parser, option, default=None):
@@ -75,26 +105,178 @@ def get_value_from_config_parser(parser, option, default=None):
     return value
 
 
+def bug_id_sort_key(bug_id):
+    """Sort numeric bug ids by value, followed by bug aliases."""
+    bug_id = str(bug_id)
+    if bug_id.isdigit():
+        return (0, int(bug_id), "")
+    return (1, 0, bug_id)
+
+
+def json_safe(value):
+    """Whether the value survives storing in the pytest cache."""
+    if value is None or isinstance(
+        value, (bool, float) + six.integer_types + six.string_types
+    ):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(json_safe(item) for item in value)
+    if isinstance(value, dict):
+        return all(
+            isinstance(key, six.string_types) and json_safe(item)
+            for key, item in value.items()
+        )
+    return False
+
+
 def kwargify(f):
     """Convert function having only positional args to a function taking
     dictionary."""
+    getargspec = getattr(inspect, "getfullargspec", None) or inspect.getargspec
+    arg_names = tuple(getargspec(f).args)
+
     @wraps(f)
     def wrapped(**kwargs):
-        args = []
-        for arg in inspect.getargspec(f).args:
-            if arg not in kwargs:
-                raise TypeError(
-                    "Required parameter {0} not found in the "
-                    "context!".format(arg)
-                )
-            args.append(kwargs[arg])
-        return f(*args)
+        missing = [arg for arg in arg_names if arg not in kwargs]
+        if missing:
+            raise TypeError(
+                "Required parameter {0} not found in the "
+                "context!".format(missing[0])
+            )
+        return f(*[kwargs[arg] for arg in arg_names])
     return wrapped
 
 
+# Outcome of the bugs evaluation for one test, reasons are None when not hit
+BugzillaDecision = namedtuple(
+    "BugzillaDecision", ["xfail_reason", "skip_reason"],
+)
+
+
+@total_ordering
+class LooseVersion(object):
+    """Version number of free form, compared component by component.
+
+    Replacement of distutils.version.LooseVersion, distutils is deprecated
+    and gone since Python 3.12. Numeric components compare as numbers and
+    sort before alphabetic ones.
+    """
+    component_re = re.compile(r"(\d+ | [a-z]+ | \.)", re.VERBOSE)
+
+    def __init__(self, vstring=None):
+        self.vstring = vstring
+        self.version = []
+        if vstring:
+            for component in self.component_re.split(vstring):
+                if not component or component == ".":
+                    continue
+                try:
+                    component = int(component)
+                except ValueError:
+                    pass
+                self.version.append(component)
+        self._key = tuple(
+            (isinstance(component, six.string_types), component)
+            for component in self.version
+        )
+
+    @classmethod
+    def _coerce(cls, other):
+        if isinstance(other, cls):
+            return other
+        # Other version classes, like distutils ones, keep the string too
+        vstring = getattr(other, "vstring", other)
+        if isinstance(vstring, six.string_types):
+            return cls(vstring)
+        return None
+
+    def __eq__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return self._key == other._key
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __lt__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return self._key < other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __str__(self):
+        return self.vstring or ""
+
+    def __repr__(self):
+        return "LooseVersion ('{0}')".format(self)
+
+
+def call_with_retries(func, *args):
+    """Call func, retry it with exponential backoff on network errors."""
+    for attempt in range(_retries):
+        try:
+            return func(*args)
+        except (socket.error, six.moves.xmlrpc_client.ProtocolError) as ex:
+            # requests.HTTPError holds the response, ProtocolError the code
+            response = getattr(ex, "response", None)
+            status = getattr(response, "status_code", getattr(ex, "errcode", None))
+            if status in _auth_http_statuses or attempt + 1 == _retries:
+                raise
+            delay = _retry_delay * (2 ** attempt + random.random() * 0.2)
+            logger.warning(
+                "Request to Bugzilla failed (%s), retrying in %.1fs",
+                ex, delay,
+            )
+            time.sleep(delay)
+
+
+class BugsPool(object):
+    """Cache of wrapped bugs dropping the least recently used ones."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._bugs = OrderedDict()
+
+    def __contains__(self, bug_id):
+        return bug_id in self._bugs
+
+    def __len__(self):
+        return len(self._bugs)
+
+    def __getitem__(self, bug_id):
+        bug = self._bugs.pop(bug_id)
+        self._bugs[bug_id] = bug
+        return bug
+
+    def __setitem__(self, bug_id, bug):
+        self._bugs.pop(bug_id, None)
+        self._bugs[bug_id] = bug
+        while len(self._bugs) > self.maxsize:
+            self._bugs.popitem(last=False)
+
+    def pop(self, bug_id, *default):
+        return self._bugs.pop(bug_id, *default)
+
+
+_bugs_pool = BugsPool(_bugs_pool_size)  # Cache bugs for greater speed
+
+
+class CachedBug(object):
+    """Fetched bug attributes, possibly restored from the pytest cache."""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
 class BugWrapper(object):
     def __init__(self, bug, loose):
         self._bug = bug
+        # Copy the frequently read attributes to avoid relaying them
+        for field in _hot_bug_fields:
+            setattr(self, field, getattr(bug, field))
         # We need to generate looseversions for simple comparison of the
         # version params.
         for loose_version_param in loose:
@@ -106,7 +288,7 @@ class BugWrapper(object):
             setattr(
                 self,
                 loose_version_param,
-                LooseVersion(re.sub(r"^[^0-9]+", "", param))
+                LooseVersion(_version_prefix_re.sub("", param))
             )
 
     def __getattr__(self, attr):
@@ -115,44 +297,246 @@ class BugWrapper(object):
 
 
 class BugzillaBugs(object):
-    def __init__(self, bugzilla, loose, *bug_ids):
-        self.bugzilla = bugzilla
+    def __init__(self, hooks, *bug_ids):
+        # The hooks connect to Bugzilla only when a bug has to be fetched
+        self.hooks = hooks
         self.bug_ids = bug_ids
-        self.loose = loose
+
+    @property
+    def bugs(self):
+        """List of the bugs, the pool stays their only owner."""
+        return list(self.bugs_gen)
 
     @property
     def bugs_gen(self):
         for bug_id in self.bug_ids:
-            if bug_id not in _bugs_pool:
-                bug = BugWrapper(self.bugzilla.getbug(bug_id), self.loose)
-                _bugs_pool[bug_id] = bug
-            yield _bugs_pool[bug_id]
+            yield self._get_bug(bug_id)
+
+    def _get_bug(self, bug_id):
+        return self.hooks.get_bug(bug_id)
 
     def bug(self, id):
         """Returns Bugzilla's Bug object for given ID"""
-        id = int(id)
-        if id not in self.bug_ids:
-            raise ValueError("Could not find bug with id {0}".format(id))
-
-        if id in _bugs_pool:
-            return _bugs_pool[id]
-
-        bug = BugWrapper(self.bugzilla.getbug(id), self.loose)
-        _bugs_pool[id] = bug
-        return bug
+        # Marker keys may be given as integers as well as strings
+        for bug_id in self.bug_ids:
+            if str(bug_id) == str(id):
+                return self._get_bug(bug_id)
+        raise ValueError("Could not find bug with id {0}".format(id))
 
 
 class BugzillaHooks(object):
-    def __init__(self, config, bugzilla, loose, version="0"):
+    def __init__(
+        self, config, bugzilla_kwargs, loose, version="0", cache_ttl=0,
+        workers=1, extra_fields=(),
+    ):
         self.config = config
-        self.bugzilla = bugzilla
+        # Logging in costs a request, connect only when bugs are needed
+        self._bugzilla_kwargs = bugzilla_kwargs
+        self._connection_error = None
         self.version = version
+        self._loose_version = LooseVersion(version) if version else None
         self.loose = loose
+        self.cache_ttl = cache_ttl
+        self.workers = workers
+        self.bug_fields = list(_default_bug_fields)
+        for field in list(loose) + list(extra_fields):
+            if field not in self.bug_fields:
+                self.bug_fields.append(field)
+        self._show_url_prefix = None
+        self._guards = {}  # kwargified guards by the original functions
+        # Bugs fetched during collection, kept until the decisions are made
+        # as the pool may be too small to hold all of them
+        self._fetched = {}
+        # Bugs differ between servers and users who may see private ones
+        server = "\n".join(
+            six.text_type(bugzilla_kwargs.get(key) or "")
+            for key in ("url", "user", "api_key")
+        )
+        self._cache_prefix = "bugzilla/{0}/bug_".format(
+            hashlib.sha1(server.encode("utf-8")).hexdigest()[:16],
+        )
+
+    def __getattr__(self, attr):
+        """Connect the Bugzilla client on first use.
+
+        Not a property, pytest reads those when scanning the plugin for
+        fixtures, which would connect every session.
+        """
+        if attr != "bugzilla":
+            raise AttributeError(attr)
+        # Do not log in again for every test once it failed
+        if self._connection_error is None:
+            try:
+                self.bugzilla = call_with_retries(
+                    partial(bugzilla.Bugzilla, **self._bugzilla_kwargs),
+                )
+                return self.bugzilla
+            except Exception as ex:
+                self._connection_error = pytest.UsageError(
+                    "Connection to Bugzilla at {0} failed: {1}".format(
+                        self._bugzilla_kwargs["url"], ex,
+                    )
+                )
+        raise self._connection_error
+
+    @property
+    def show_url_prefix(self):
+        """URL of bug page, the bug id is to be appended."""
+        if self._show_url_prefix is None:
+            if "bugzilla" in self.__dict__:
+                url = self.bugzilla.url
+            else:
+                # Do not connect just to get the URL, normalize it the same
+                # way the client does
+                url = self._bugzilla_kwargs["url"]
+                fix_url = getattr(bugzilla.Bugzilla, "fix_url", None)
+                if fix_url is not None:
+                    url = fix_url(url)
+            self._show_url_prefix = "{0}?id=".format(
+                url.replace("xmlrpc.cgi", "show_bug.cgi"),
+            )
+        return self._show_url_prefix
+
+    def _guard(self, func):
+        """Returns kwargified guard, wrapped once per guard function."""
+        try:
+            return self._guards[func]
+        except KeyError:
+            guard = self._guards[func] = kwargify(func)
+            return guard
 
     def add_bug_to_cache(self, bug_obj):
         """For test purposes only"""
         _bugs_pool[str(bug_obj.id)] = BugWrapper(bug_obj, self.loose)
 
+    @property
+    def _disk_cache(self):
+        if self.cache_ttl <= 0:
+            return None
+        # Cache provider plugin may be disabled
+        return getattr(self.config, "cache", None)
+
+    def _load_from_cache(self, bug_id):
+        """Returns bug stored by one of previous runs or None."""
+        cache = self._disk_cache
+        if cache is None:
+            return None
+        fields = cache.get(self._cache_prefix + str(bug_id), None)
+        if not fields:
+            return None
+        # Fields of interest could change since the bug was stored
+        if any(field not in fields for field in self.bug_fields):
+            return None
+        if time.time() - fields.pop("cached_at", 0) > self.cache_ttl:
+            return None
+        return CachedBug(**fields)
+
+    def _store_to_cache(self, bug_id, bug):
+        cache = self._disk_cache
+        if cache is None:
+            return
+        fields = dict(bug.__dict__)
+        if not json_safe(fields):
+            # E.g. xmlrpc DateTime values of extra fields
+            logger.debug("Bug %s cannot be stored in the cache", bug_id)
+            return
+        fields["cached_at"] = time.time()
+        cache.set(self._cache_prefix + str(bug_id), fields)
+
+    def _prune(self, bug):
+        """Keep only the fields of interest of the fetched bug."""
+        return CachedBug(**dict(
+            (field, getattr(bug, field, None)) for field in self.bug_fields
+        ))
+
+    def get_bug(self, bug_id):
+        """Returns wrapped bug, fetching it when it is not cached."""
+        if bug_id in self._fetched:
+            return self._fetched[bug_id]
+        try:
+            return _bugs_pool[bug_id]
+        except KeyError:
+            # Bug was not prefetched during collection or was evicted
+            pass
+        bug = self._load_from_cache(bug_id)
+        if bug is None:
+            bug = self._prune(call_with_retries(self._getbug, bug_id))
+            self._store_to_cache(bug_id, bug)
+        wrapped = _bugs_pool[bug_id] = BugWrapper(bug, self.loose)
+        return wrapped
+
+    def _getbug(self, bug_id):
+        # The client converts field aliases in the given list in place and
+        # is connected lazily, access it within the retries
+        return self.bugzilla.getbug(
+            bug_id, include_fields=list(self.bug_fields),
+        )
+
+    def fetch_bugs(self, bug_ids):
+        """Fetch all not yet cached bugs using as few requests as possible.
+
+        :returns: dict of the wrapped bugs which are available by their ids.
+        """
+        fetched = {}
+        missing = []
+        for bug_id in sorted(set(bug_ids), key=bug_id_sort_key):
+            if bug_id in _bugs_pool:
+                fetched[bug_id] = _bugs_pool[bug_id]
+                continue
+            bug = self._load_from_cache(bug_id)
+            if bug is None:
+                missing.append(bug_id)
+            else:
+                fetched[bug_id] = _bugs_pool[bug_id] = BugWrapper(
+                    bug, self.loose,
+                )
+
+        for start in range(0, len(missing), _getbugs_chunk_size):
+            chunk = missing[start:start + _getbugs_chunk_size]
+            # Bugs are returned in the order of the ids, which may be
+            # aliases, inaccessible bugs as None
+            for bug_id, bug in zip(chunk, self._getbugs(chunk)):
+                if bug is not None:
+                    bug = self._prune(bug)
+                    fetched[bug_id] = _bugs_pool[bug_id] = BugWrapper(
+                        bug, self.loose,
+                    )
+                    self._store_to_cache(bug_id, bug)
+        return fetched
+
+    def _getbugs(self, bug_ids):
+        """Fetch bugs by one request, or by parallel ones when the server
+        does not support it."""
+        try:
+            return call_with_retries(self._getbugs_batch, bug_ids)
+        except (six.moves.xmlrpc_client.Fault, bugzilla.BugzillaError):
+            logger.warning(
+                "Fetching of multiple bugs failed, fetching them one by one",
+                exc_info=True,
+            )
+        if self.workers <= 1:
+            return [self._getbug_permissive(bug_id) for bug_id in bug_ids]
+        # Requests are I/O bound, the client does not hold the GIL meanwhile
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self._getbug_permissive, bug_ids))
+
+    def _getbugs_batch(self, bug_ids):
+        # The client is connected lazily, access it within the retries
+        return self.bugzilla.getbugs(
+            bug_ids, include_fields=list(self.bug_fields),
+        )
+
+    def _getbug_permissive(self, bug_id):
+        """Returns None for a bug which cannot be fetched, like getbugs()
+        does, so the error is reported for the related tests only."""
+        try:
+            return call_with_retries(self._getbug, bug_id)
+        except pytest.UsageError:
+            raise
+        except Exception:
+            logger.warning("Fetching of bug %s failed", bug_id, exc_info=True)
+            return None
+
     def _should_skip_due_to_api(self, item, engines):
 
         if not engines:
@@ -214,128 +598,104 @@ class BugzillaHooks(object):
         if "bugzilla" not in item.keywords:
             return
 
+        # Decision is made during collection, evaluate here only when it
+        # was not possible there
+        decision = getattr(item, "_bugzilla_decision", None)
+        if decision is None:
+            decision = self.evaluate(item)
+
+        if decision.xfail_reason:
+            item.add_marker(pytest.mark.xfail(reason=decision.xfail_reason))
+        elif decision.skip_reason:
+            pytest.skip(decision.skip_reason)
+
+    def evaluate(self, item):
+        """
+        Evaluate guards and statuses of bugs related to the test.
+        :param item: test marked by bugzilla marker.
+        :returns: BugzillaDecision
+        """
         bugs_in_cache = item.funcargs["bugs_in_cache"]
         bugzilla_marker_related_to_case = item.get_closest_marker(name='bugzilla')
-        xfail = kwargify(
-            bugzilla_marker_related_to_case.kwargs.get(
-                "xfail_when", lambda: False
-            )
-        )
-        if xfail:
-            xfailed = self.evaluate_xfail(xfail, bugs_in_cache)
-            if xfailed:
-                url = "{0}?id=".format(
-                    self.bugzilla.url.replace("xmlrpc.cgi", "show_bug.cgi"),
-                )
-                item.add_marker(
-                    pytest.mark.xfail(
-                        reason="xfailing due to bugs: {0}".format(
-                            ", ".join(
-                                map(
-                                    lambda bug: "{0}{1}".format(
-                                        url, str(bug.id)
-                                    ),
-                                    xfailed)
-                            )
-                        )
-                    )
-                )
-                return
-
-        skip = kwargify(
-            bugzilla_marker_related_to_case.kwargs.get(
-                "skip_when", lambda: False
-            )
-        )
-        if skip:
-            self.evaluate_skip(skip, bugs_in_cache)
+        # Guards are optional, do not evaluate them when they are not given
+        xfail = skip = None
+        xfail_when = bugzilla_marker_related_to_case.kwargs.get("xfail_when")
+        if xfail_when is not None:
+            xfail = self._guard(xfail_when)
+        skip_when = bugzilla_marker_related_to_case.kwargs.get("skip_when")
+        if skip_when is not None:
+            skip = self._guard(skip_when)
+
+        context = {}
+        if self._loose_version is not None:
+            context["version"] = self._loose_version
 
         bugs_related_to_case = bugzilla_marker_related_to_case.args[0]
-        bugs_objs = []
+        url = self.show_url_prefix
+        xfailed = []  # URLs of bugs hit by xfail guard
+        skip_hit = False
+        skippers = []  # Descriptions of bugs leading to skipping
 
+        # Evaluate guards and statuses of all related bugs in one pass
         for bug_id in bugs_related_to_case.keys():
-            bugs_objs.append(bugs_in_cache[bug_id])
-
-        skippers = []
+            for bug in bugs_in_cache[bug_id].bugs:
+                context["bug"] = bug
+                if xfail is not None and xfail(**context):
+                    xfailed.append("{0}{1}".format(url, bug.id))
+                if skip is not None and not skip_hit and skip(**context):
+                    skip_hit = True
 
-        for bz in bugs_objs:
-            for bug in bz.bugs_gen:
                 if bug.status == "CLOSED":
                     logger.info(
                         "Id:{0}; Status:{1}; Resolution:{2}; [RUNNING]".format(
                             bug.id, bug.status, bug.resolution
                         )
                     )
-                elif bug.status in ["VERIFIED", "ON_QA"]:
+                elif bug.status in _running_statuses:
                     logger.info(
                         "Id: {0}; Status: {1}; [RUNNING]".format(
                             bug.id, bug.status
                         )
                     )
                 elif self._should_skip(
-                        item, bugs_related_to_case[str(bug.id)]
+                        item, bugs_related_to_case[bug_id]
                 ):
-                    skippers.append(bug)
+                    skippers.append(
+                        "Bug summary: {0} Status: {1} URL: {2}{3}".format(
+                            bug.summary, bug.status, url, bug.id
+                        )
+                    )
                     logger.info(
                         "Id: {0}; Status: {1}; [SKIPPING]".format(
                             bug.id, bug.status
                         )
                     )
 
-        url = "{0}?id=".format(
-            self.bugzilla.url.replace("xmlrpc.cgi", "show_bug.cgi"),
-        )
+        if xfailed:
+            return BugzillaDecision(
+                "xfailing due to bugs: " + ", ".join(xfailed), None,
+            )
 
-        if skippers:
-            skipping_summary = (
-                "Skipping due to: "
-                "\n".join(
-                    [
-                        "Bug summary: {0} Status: {1} URL: {2}{3}".format(
-                            bug.summary, bug.status, url, bug.id
-                        )
-                        for bug in skippers
-                    ]
-                )
+        if skip_hit:
+            return BugzillaDecision(
+                None,
+                "Skipped due to a given condition: {0}".format(
+                    inspect.getsource(skip)
+                ),
             )
 
+        if skippers:
+            skipping_summary = "Skipping due to:\n" + "\n".join(skippers)
+
             logger.info(
                 "Test case {0} will be skipped due to:\n {1}".format(
                     item.name, skipping_summary
                 )
             )
 
-            pytest.skip(skipping_summary)
-
-    def evaluate_skip(self, skip, bugs):
-        bugs_obj = bugs.values()
-
-        for bug_obj in bugs_obj:
-            for bz in bug_obj.bugs_gen:
-                context = {"bug": bz}
-                if self.version:
-                    context["version"] = LooseVersion(self.version)
-                if skip(**context):
-                    pytest.skip(
-                        "Skipped due to a given condition: {0}".format(
-                            inspect.getsource(skip)
-                        )
-                    )
-
-    def evaluate_xfail(self, xfail, bugs):
-        results = []
-
-        # for bug in bugs.bugs_gen:
-        bugs_obj = bugs.values()
+            return BugzillaDecision(None, skipping_summary)
 
-        for bug_obj in bugs_obj:
-            for bz in bug_obj.bugs_gen:
-                context = {"bug": bz}
-                if self.version:
-                    context["version"] = LooseVersion(self.version)
-                if xfail(**context):
-                    results.append(bz)
-        return results
+        return BugzillaDecision(None, None)
 
     def pytest_collection_modifyitems(self, session, config, items):
         reporter = config.pluginmanager.getplugin("terminalreporter")
@@ -343,22 +703,56 @@ class BugzillaHooks(object):
         if reporter:
             reporter.write("Checking for bugzilla-related tests\n", bold=True)
         cache = {}
+        marked_items = []
         for item in items:
-            for marker in item.iter_markers(name='bugzilla'):
-                bugs = marker.args[0]
-                bugs_ids = bugs.keys()
+            markers = list(item.iter_markers(name='bugzilla'))
+            if not markers:
+                continue
 
-                for bz_id in bugs_ids:
+            for marker in markers:
+                for bz_id in marker.args[0]:
                     if bz_id not in cache:
-                        if reporter:
-                            reporter.write(".")
-                        cache[bz_id] = BugzillaBugs(
-                            self.bugzilla, self.loose, bz_id
-                        )
-
-                item.funcargs["bugs_in_cache"] = cache
+                        cache[bz_id] = BugzillaBugs(self, bz_id)
+
+            item.funcargs["bugs_in_cache"] = cache
+            marked_items.append(item)
+
+        try:
+            fetched = self.fetch_bugs(cache.keys())
+        except pytest.UsageError:
+            # Stop the session, the tests cannot be decided without Bugzilla
+            raise
+        except Exception:
+            # Tests with bugs which were not fetched fail in their setup
+            logger.warning("Fetching of bugs failed", exc_info=True)
+            fetched = {}
+
+        self._fetched = fetched
+        try:
+            for item in marked_items:
+                marker = item.get_closest_marker(name='bugzilla')
+                if any(bug_id not in fetched for bug_id in marker.args[0]):
+                    # Do not try to fetch the bugs again, let the setup do it
+                    continue
+                try:
+                    item._bugzilla_decision = self.evaluate(item)
+                except pytest.UsageError:
+                    raise
+                except Exception:
+                    # Let the setup evaluate it again, so the error is
+                    # reported for the test instead of failing the whole
+                    # collection
+                    logger.debug(
+                        "Evaluation of %s postponed to setup", item.name,
+                        exc_info=True,
+                    )
+        finally:
+            # The pool alone keeps the bugs needed later on
+            self._fetched = {}
 
         if reporter:
+            # One progress dot per bug, written at once
+            reporter.write("." * len(cache))
             reporter.write(
                 "\nChecking for bugzilla-related tests has finished\n",
                 bold=True,
@@ -443,12 +837,46 @@ def pytest_addoption(parser):
         metavar='loose',
         help='Overrides the project loose in bugzilla.cfg.',
     )
+    group.addoption(
+        '--bugzilla-extra-fields',
+        action='store',
+        dest='bugzilla_extra_fields',
+        default=get_value_from_config_parser(
+            config, 'bugzilla_extra_fields', '',
+        ),
+        metavar='fields',
+        help='Overrides the additional bug fields to fetch in bugzilla.cfg.',
+    )
+    group.addoption(
+        '--bugzilla-cache-ttl',
+        action='store',
+        type=int,
+        dest='bugzilla_cache_ttl',
+        default=get_value_from_config_parser(
+            config, 'bugzilla_cache_ttl', _default_cache_ttl,
+        ),
+        metavar='seconds',
+        help='Overrides the bug cache expiration in bugzilla.cfg.',
+    )
+    group.addoption(
+        '--bugzilla-workers',
+        action='store',
+        type=int,
+        dest='bugzilla_workers',
+        default=get_value_from_config_parser(
+            config, 'bugzilla_workers', _default_workers,
+        ),
+        metavar='workers',
+        help='Overrides the number of parallel bug requests used when '
+             'the server cannot fetch multiple bugs at once in bugzilla.cfg.',
+    )
 
 
 def pytest_configure(config):
     """
     If bugzilla is neabled, setup a session
-    with bugzilla_url.
+    with bugzilla_url. The session is connected lazily, when the first
+    marked test is collected.
 
     :param config: configuration object
     """
@@ -464,11 +892,11 @@ def pytest_configure(config):
     api_key = config.getvalue('bugzilla_api_key')
     if config.getvalue("bugzilla") and url:
         if username and password:
-            bz = bugzilla.Bugzilla(url=url, user=username, password=password)
+            bz_kwargs = dict(url=url, user=username, password=password)
         elif api_key:
-            bz = bugzilla.Bugzilla(url=url, api_key=api_key)
+            bz_kwargs = dict(url=url, api_key=api_key)
         else:
-            bz = bugzilla.Bugzilla(url=url)
+            bz_kwargs = dict(url=url)
 
         version = config.getvalue('bugzilla_version')
         loose = [
@@ -478,5 +906,16 @@ def pytest_configure(config):
         if len(loose) == 1 and not loose[0]:
             loose = []
 
-        my = BugzillaHooks(config, bz, loose, version)
+        extra_fields = [
+            x.strip()
+            for x in config.getvalue('bugzilla_extra_fields').split(",")
+            if x.strip()
+        ]
+        cache_ttl = config.getvalue('bugzilla_cache_ttl')
+        workers = config.getvalue('bugzilla_workers')
+
+        my = BugzillaHooks(
+            config, bz_kwargs, loose, version, cache_ttl, workers,
+            extra_fields,
+        )
         assert config.pluginmanager.register(my, "bugzilla_helper")
@@ -32,7 +32,10 @@ setup(
         'pytest11': ['pytest_marker_bugzilla = pytest_marker_bugzilla'],
     },
     zip_safe=False,
-    install_requires=['python-bugzilla>=0.6.2', 'pytest>=2.2.4', 'six'],
+    install_requires=[
+        'python-bugzilla>=0.6.2', 'pytest>=2.2.4', 'six',
+        'futures; python_version < "3"',
+    ],
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -121,6 +121,24 @@ def test_new_int_bug_failing(testdir):
     result.assert_outcomes(0, 1, 0)
 
 
+def test_new_bug_skip_reason(testdir):
+    testdir.makeconftest(CONFTEST)
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'1': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest('-rs', *BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    result.stdout.fnmatch_lines([
+        "*Skipping due to:*",
+        "*Bug summary: ONE Status: NEW "
+        "URL: https://bugzilla.redhat.com/show_bug.cgi?id=1*",
+    ])
+
+
 def test_new_bug_passing(testdir):
     testdir.makeconftest(CONFTEST)
     testdir.makepyfile("""
@@ -230,6 +248,30 @@ def test_skip_when_feature(testdir):
     result.assert_outcomes(0, 1, 0)
 
 
+def test_skip_when_only_related_bugs(testdir):
+    testdir.makeconftest(CONFTEST)
+    testdir.makepyfile("""
+        import os
+        import pytest
+
+        @pytest.mark.bugzilla(
+            {'3': {}},
+            skip_when=lambda bug: bug.status == "POST"
+        )
+        def test_post_bug():
+            assert True
+
+        @pytest.mark.bugzilla(
+            {'2': {}},
+            skip_when=lambda bug: bug.status == "POST"
+        )
+        def test_closed_bug():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(1, 1, 0)
+
+
 def test_xfail_when_feature(testdir):
     testdir.makeconftest(CONFTEST)
     testdir.makepyfile("""
@@ -249,6 +291,26 @@ def test_xfail_when_feature(testdir):
     assert d.get('xfailed', 0) == 1
 
 
+def test_guard_error_reported_for_test(testdir):
+    testdir.makeconftest(CONFTEST)
+    testdir.makepyfile("""
+        import os
+        import pytest
+
+        @pytest.mark.bugzilla(
+            {'3': {}},
+            xfail_when=lambda bug, version: bug.fixed_in > version
+        )
+        def test_without_version():
+            assert True
+
+        def test_pass():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(1, 0, 0, errors=1)
+
+
 def test_config_file(testdir):
     testdir.makefile(
         '.cfg',
@@ -395,3 +457,642 @@ def test_skip_because_of_no_numa(testdir):
     """)
     result = testdir.runpytest(*BUGZILLA_ARGS)
     result.assert_outcomes(0, 1, 0)
+
+
+FAKE_BUGZILLA_CONFTEST = """
+from collections import namedtuple
+import os
+import socket
+import pytest
+import six
+import pytest_marker_bugzilla
+
+
+FakeBug = namedtuple(
+    'FakeBug', ['id', 'status', 'summary', 'resolution', 'component'],
+)
+
+
+class BaseFakeBugzilla(object):
+    url = 'https://bugzilla.redhat.com/xmlrpc.cgi'
+    calls = []
+
+    def make_bug(self, bug_id):
+        return FakeBug(int(bug_id), 'NEW', 'FETCHED', None, 'network')
+
+    def getbug(self, bug_id, **kwargs):
+        self.calls.append(('getbug', bug_id))
+        return self.make_bug(bug_id)
+
+    def getbugs(self, bug_ids, **kwargs):
+        self.calls.append(('getbugs', tuple(bug_ids)))
+        return [self.make_bug(bug_id) for bug_id in bug_ids]
+
+
+# Tests override the behaviour by subclassing FakeBugzilla
+FakeBugzilla = BaseFakeBugzilla
+
+
+@pytest.mark.tryfirst
+def pytest_collection_modifyitems(session, config, items):
+    plug = config.pluginmanager.getplugin('bugzilla_helper')
+    plug.bugzilla = FakeBugzilla()
+"""
+
+
+def test_bugs_fetched_in_one_batch(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+def pytest_sessionfinish(session):
+    assert FakeBugzilla.calls == [('getbugs', ('101', '102'))]
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'102': {}})
+        def test_one():
+            assert True
+
+        @pytest.mark.bugzilla({'101': {}, '102': {}})
+        def test_two():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 2, 0)
+    assert result.ret == 0
+
+
+def test_bug_alias(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def make_bug(self, bug_id):
+        bug_id = 103 if bug_id == 'CVE-2020-1234' else int(bug_id)
+        return FakeBug(bug_id, 'NEW', 'FETCHED', None, 'network')
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'CVE-2020-1234': {}})
+        def test_alias():
+            assert True
+
+        @pytest.mark.bugzilla({'104': {}})
+        def test_id():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 2, 0)
+
+
+def test_fetch_failure_reported_for_marked_tests(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbug(self, bug_id, **kwargs):
+        raise RuntimeError('Bugzilla is down')
+
+    getbugs = getbug
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'105': {}})
+        def test_marked():
+            assert True
+
+        def test_unmarked():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(1, 0, 0, errors=1)
+
+
+DISK_CACHE_CONFTEST = FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbug(self, bug_id, **kwargs):
+        raise AssertionError('Bugs should be fetched in batch')
+
+    def getbugs(self, bug_ids, **kwargs):
+        if os.path.exists('offline'):
+            raise AssertionError('Bugs should be loaded from the cache')
+        return BaseFakeBugzilla.getbugs(self, bug_ids, **kwargs)
+
+
+def pytest_collection(session):
+    for bug_id in ('201', '202'):
+        pytest_marker_bugzilla._bugs_pool.pop(bug_id, None)
+"""
+
+
+def test_bugs_loaded_from_disk_cache(testdir):
+    testdir.makeconftest(DISK_CACHE_CONFTEST)
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'201': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    testdir.makefile('', offline='')
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+
+
+def test_no_connection_with_warm_cache(testdir):
+    testdir.makeconftest(DISK_CACHE_CONFTEST + """
+import bugzilla
+
+
+class ConnectingBugzilla(FakeBugzilla):
+    def __init__(self, **kwargs):
+        if os.path.exists('offline'):
+            raise AssertionError('Bugzilla should not be connected')
+
+
+def pytest_configure(config):
+    config._original_bugzilla = bugzilla.Bugzilla
+    bugzilla.Bugzilla = ConnectingBugzilla
+
+
+def pytest_unconfigure(config):
+    bugzilla.Bugzilla = config._original_bugzilla
+
+
+@pytest.mark.tryfirst
+def pytest_collection_modifyitems(session, config, items):
+    # Let the plugin create the client lazily
+    pass
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'201': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest('-rs', *BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    testdir.makefile('', offline='')
+    result = testdir.runpytest('-rs', *BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    result.stdout.fnmatch_lines([
+        "*URL: https://bugzilla.redhat.com/show_bug.cgi?id=201*",
+    ])
+
+
+def test_disk_cache_per_server(testdir):
+    testdir.makeconftest(DISK_CACHE_CONFTEST)
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'201': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    testdir.makefile('', offline='')
+    result = testdir.runpytest(
+        '--bugzilla', '--bugzilla-url=https://bugzilla.example.com/xmlrpc.cgi',
+    )
+    result.assert_outcomes(0, 0, 0, errors=1)
+
+
+def test_disk_cache_skips_non_json_fields(testdir):
+    testdir.makeconftest(DISK_CACHE_CONFTEST + """
+DateBug = namedtuple('DateBug', ['id', 'status', 'summary', 'changed'])
+
+
+class FakeBugzilla(FakeBugzilla):
+    def make_bug(self, bug_id):
+        return DateBug(
+            int(bug_id), 'NEW', 'FETCHED',
+            six.moves.xmlrpc_client.DateTime('20200101T00:00:00'),
+        )
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'201': {}})
+        def test_new_bug():
+            assert True
+
+        @pytest.mark.bugzilla({'202': {}})
+        def test_other_new_bug():
+            assert True
+    """)
+    args = BUGZILLA_ARGS + ('--bugzilla-extra-fields', 'changed')
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(0, 2, 0)
+
+
+def test_disk_cache_disabled(testdir):
+    testdir.makeconftest(DISK_CACHE_CONFTEST)
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'201': {}})
+        def test_new_bug():
+            assert True
+    """)
+    args = BUGZILLA_ARGS + ('--bugzilla-cache-ttl', '0')
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(0, 1, 0)
+    testdir.makefile('', offline='')
+    result = testdir.runpytest(*args)
+    assert result.ret != 0
+
+
+def test_bugs_pool_drops_least_recently_used():
+    from pytest_marker_bugzilla import BugsPool
+
+    pool = BugsPool(2)
+    pool['1'] = 'one'
+    pool['2'] = 'two'
+    assert pool['1'] == 'one'
+    pool['3'] = 'three'
+    assert '1' in pool
+    assert '2' not in pool
+    assert '3' in pool
+    assert len(pool) == 2
+
+
+def test_bugzilla_bugs_bug_by_id_of_any_type():
+    import pytest
+    from pytest_marker_bugzilla import BugzillaBugs
+
+    class Hooks(object):
+        def get_bug(self, bug_id):
+            return ('bug', bug_id)
+
+    bugs = BugzillaBugs(Hooks(), 1, '2')
+    assert bugs.bug('1') == ('bug', 1)
+    assert bugs.bug(1) == ('bug', 1)
+    assert bugs.bug(2) == ('bug', '2')
+    with pytest.raises(ValueError):
+        bugs.bug(3)
+
+
+def test_bugs_pool_smaller_than_collected_bugs(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+def pytest_configure(config):
+    config._bugs_pool = pytest_marker_bugzilla._bugs_pool
+    pytest_marker_bugzilla._bugs_pool = pytest_marker_bugzilla.BugsPool(2)
+
+
+def pytest_unconfigure(config):
+    pytest_marker_bugzilla._bugs_pool = config._bugs_pool
+
+
+def pytest_sessionfinish(session):
+    ids = tuple(str(bug_id) for bug_id in range(121, 127))
+    assert FakeBugzilla.calls == [('getbugs', ids)]
+""")
+    testdir.makepyfile("import pytest\n" + "".join(
+        "@pytest.mark.bugzilla({{'{0}': {{}}}})\n"
+        "def test_{0}():\n"
+        "    assert True\n".format(bug_id)
+        for bug_id in range(121, 127)
+    ))
+    args = BUGZILLA_ARGS + ('--bugzilla-cache-ttl', '0')
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(0, 6, 0)
+
+
+def test_bugs_pool_bounded_in_session(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+def pytest_configure(config):
+    config._bugs_pool = pytest_marker_bugzilla._bugs_pool
+    pytest_marker_bugzilla._bugs_pool = pytest_marker_bugzilla.BugsPool(2)
+
+
+def pytest_unconfigure(config):
+    pytest_marker_bugzilla._bugs_pool = config._bugs_pool
+
+
+def pytest_sessionfinish(session):
+    assert len(pytest_marker_bugzilla._bugs_pool) <= 2
+    assert all(call[0] == 'getbugs' for call in FakeBugzilla.calls)
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'111': {}})
+        def test_one():
+            assert True
+
+        @pytest.mark.bugzilla({'112': {}})
+        def test_two():
+            assert True
+
+        @pytest.mark.bugzilla({'113': {}})
+        def test_three():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 3, 0)
+    assert result.ret == 0
+
+
+def test_bugs_fetched_one_by_one_on_batch_failure(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbugs(self, bug_ids, **kwargs):
+        raise six.moves.xmlrpc_client.Fault(32610, 'Not supported')
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'301': {}})
+        def test_one():
+            assert True
+
+        @pytest.mark.bugzilla({'302': {}})
+        def test_two():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 2, 0)
+
+
+def test_private_bug_on_batch_failure(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbug(self, bug_id, **kwargs):
+        if bug_id == '304':
+            raise six.moves.xmlrpc_client.Fault(102, 'Not authorized')
+        return BaseFakeBugzilla.getbug(self, bug_id, **kwargs)
+
+    def getbugs(self, bug_ids, **kwargs):
+        raise six.moves.xmlrpc_client.Fault(32610, 'Not supported')
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'303': {}})
+        def test_one():
+            assert True
+
+        @pytest.mark.bugzilla({'304': {}})
+        def test_private():
+            assert True
+
+        def test_unmarked():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(1, 1, 0, errors=1)
+
+
+def test_bugs_fetch_retried_on_network_error(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbugs(self, bug_ids, **kwargs):
+        result = BaseFakeBugzilla.getbugs(self, bug_ids, **kwargs)
+        if len(self.calls) == 1:
+            raise socket.error('Connection reset by peer')
+        return result
+
+
+def pytest_configure(config):
+    # Do not really wait between the attempts
+    config._retry_delay = pytest_marker_bugzilla._retry_delay
+    pytest_marker_bugzilla._retry_delay = 0
+
+
+def pytest_unconfigure(config):
+    pytest_marker_bugzilla._retry_delay = config._retry_delay
+
+
+def pytest_sessionfinish(session):
+    assert len(FakeBugzilla.calls) == 2
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'401': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    assert result.ret == 0
+
+
+def test_connection_retried_on_network_error(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+import bugzilla
+
+
+class ConnectingBugzilla(FakeBugzilla):
+    attempts = 0
+
+    def __init__(self, **kwargs):
+        ConnectingBugzilla.attempts += 1
+        import traceback; traceback.print_stack()
+        if ConnectingBugzilla.attempts == 1:
+            raise socket.error('Connection reset by peer')
+
+
+def pytest_configure(config):
+    config._original_bugzilla = bugzilla.Bugzilla
+    config._retry_delay = pytest_marker_bugzilla._retry_delay
+    bugzilla.Bugzilla = ConnectingBugzilla
+    pytest_marker_bugzilla._retry_delay = 0
+
+
+def pytest_unconfigure(config):
+    bugzilla.Bugzilla = config._original_bugzilla
+    pytest_marker_bugzilla._retry_delay = config._retry_delay
+
+
+@pytest.mark.tryfirst
+def pytest_collection_modifyitems(session, config, items):
+    # Let the plugin create the client lazily
+    pass
+
+
+def pytest_sessionfinish(session):
+    assert FakeBugzilla.calls == [('getbugs', ('402',))]
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'402': {}})
+        def test_new_bug():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(0, 1, 0)
+    assert result.ret == 0
+
+
+def test_failed_login_stops_session(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+import bugzilla
+
+
+class LockedBugzilla(FakeBugzilla):
+    attempts = 0
+
+    def __init__(self, **kwargs):
+        LockedBugzilla.attempts += 1
+        raise bugzilla.BugzillaError('Login failed')
+
+
+def pytest_configure(config):
+    config._original_bugzilla = bugzilla.Bugzilla
+    bugzilla.Bugzilla = LockedBugzilla
+
+
+def pytest_unconfigure(config):
+    bugzilla.Bugzilla = config._original_bugzilla
+
+
+@pytest.mark.tryfirst
+def pytest_collection_modifyitems(session, config, items):
+    # Let the plugin create the client lazily
+    pass
+
+
+def pytest_sessionfinish(session):
+    assert LockedBugzilla.attempts == 1
+    assert not FakeBugzilla.calls
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla({'403': {}})
+        def test_one():
+            assert True
+
+        @pytest.mark.bugzilla({'404': {}})
+        def test_two():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    assert result.ret == 4
+    result.stderr.fnmatch_lines([
+        "*Connection to Bugzilla at *xmlrpc.cgi failed: Login failed*",
+    ])
+
+
+def test_no_connection_without_marker(testdir):
+    testdir.makeconftest("""
+        import bugzilla
+
+
+        connections = []
+
+
+        class OfflineBugzilla(object):
+            def __init__(self, **kwargs):
+                connections.append(kwargs)
+                raise AssertionError('Bugzilla should not be connected')
+
+
+        def pytest_configure(config):
+            config._original_bugzilla = bugzilla.Bugzilla
+            bugzilla.Bugzilla = OfflineBugzilla
+
+
+        def pytest_unconfigure(config):
+            bugzilla.Bugzilla = config._original_bugzilla
+
+
+        def pytest_sessionfinish(session):
+            # Errors of reading the plugin attributes may be swallowed
+            assert not connections
+    """)
+    testdir.makepyfile("""
+        def test_pass():
+            assert True
+    """)
+    result = testdir.runpytest(*BUGZILLA_ARGS)
+    result.assert_outcomes(1, 0, 0)
+    assert result.ret == 0
+
+
+def test_extra_fields_fetched(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+class FakeBugzilla(FakeBugzilla):
+    def getbugs(self, bug_ids, include_fields=None):
+        assert 'status' in include_fields
+        assert 'component' in include_fields
+        assert 'cc' not in include_fields
+        return BaseFakeBugzilla.getbugs(self, bug_ids)
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla(
+            {'501': {}},
+            skip_when=lambda bug: bug.component == "network"
+        )
+        def test_network():
+            assert True
+    """)
+    args = BUGZILLA_ARGS + ('--bugzilla-extra-fields', 'component')
+    result = testdir.runpytest(*args)
+    result.assert_outcomes(0, 1, 0)
+
+
+def test_aliased_fields_kept(testdir):
+    testdir.makeconftest(FAKE_BUGZILLA_CONFTEST + """
+RHBug = namedtuple('RHBug', ['id', 'status', 'summary', 'fixed_in'])
+
+
+class FakeBugzilla(FakeBugzilla):
+    def make_bug(self, bug_id):
+        return RHBug(int(bug_id), 'POST', 'FETCHED', 'rhv-4.3.1')
+
+    def getbugs(self, bug_ids, include_fields=None):
+        # Red Hat Bugzilla client replaces aliases in the list in place
+        include_fields.remove('fixed_in')
+        include_fields.append('cf_fixed_in')
+        return BaseFakeBugzilla.getbugs(self, bug_ids)
+""")
+    testdir.makepyfile("""
+        import pytest
+
+        @pytest.mark.bugzilla(
+            {'502': {}},
+            xfail_when=lambda bug, version: bug.fixed_in > version
+        )
+        def test_one():
+            assert False
+
+        @pytest.mark.bugzilla(
+            {'503': {}},
+            xfail_when=lambda bug, version: bug.fixed_in > version
+        )
+        def test_two():
+            assert False
+    """)
+    args = BUGZILLA_ARGS + ('--bugzilla-project-version', '4.2')
+    result = testdir.runpytest(*args)
+    assert result.parseoutcomes().get('xfailed', 0) == 2
+
+
+def test_loose_version_comparison():
+    from pytest_marker_bugzilla import LooseVersion
+
+    assert LooseVersion("4.2.10") > LooseVersion("4.2.3")
+    assert LooseVersion("4.2.3-1.el7") > LooseVersion("4.2.3")
+    assert LooseVersion("2.0") > "1.6"
+    assert LooseVersion("1.0") == "1.0"
+    assert LooseVersion("4.2.rc1") > LooseVersion("4.2.1")
+    assert LooseVersion("") < LooseVersion("0")
+
+
+def test_loose_version_comparison_with_other_classes():
+    from pytest_marker_bugzilla import LooseVersion
+
+    class DistutilsLooseVersion(object):
+        def __init__(self, vstring):
+            self.vstring = vstring
+
+    assert LooseVersion("4.2.10") > DistutilsLooseVersion("4.2.3")
+    assert LooseVersion("1.0") == DistutilsLooseVersion("1.0")
+    assert DistutilsLooseVersion("1.6") < LooseVersion("2.0")
+    assert LooseVersion("1.0") != 1.0